@@ -5,7 +5,7 @@ from sqlalchemy import pool
 
 from alembic import context
 
-from database import metadata
+from database import metadata, sync_database_url
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -16,6 +16,11 @@ config = context.config
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
+# 使用应用配置中的数据库（去掉异步驱动），而不是 alembic.ini 中写死的 URL
+config.set_main_option(
+    "sqlalchemy.url", sync_database_url.render_as_string(hide_password=False)
+)
+
 # add your model's MetaData object here
 # for 'autogenerate' support
 # from myapp import mymodel
@@ -0,0 +1,53 @@
+"""add foreign key indexes and unique likes
+
+Revision ID: 395e4dbe62d7
+Revises: db4833ed22d1
+Create Date: 2026-10-18 10:04:51.830266
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '395e4dbe62d7'
+down_revision: Union[str, None] = 'db4833ed22d1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (索引名, 表名, 列, 是否唯一)
+INDEXES = [
+    ("ix_posts_user_id", "posts", ["user_id"], False),
+    ("ix_comments_post_id", "comments", ["post_id"], False),
+    ("ix_comments_user_id", "comments", ["user_id"], False),
+    ("ix_likes_user_id", "likes", ["user_id"], False),
+    ("uq_likes_post_id_user_id", "likes", ["post_id", "user_id"], True),
+]
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+
+    # 建立唯一索引之前，删除同一用户对同一帖子的重复点赞，只保留最早的一条
+    op.execute(
+        "DELETE FROM likes WHERE id NOT IN "
+        "(SELECT MIN(id) FROM likes GROUP BY post_id, user_id)"
+    )
+    # 删除重复点赞后重新回填帖子的点赞数
+    op.execute(
+        "UPDATE posts SET like_count = "
+        "(SELECT COUNT(*) FROM likes WHERE likes.post_id = posts.id)"
+    )
+
+    for name, table, columns, unique in INDEXES:
+        # database.py 的 metadata.create_all 可能已经创建了索引
+        existing = {index["name"] for index in inspector.get_indexes(table)}
+        if name not in existing:
+            op.create_index(name, table, columns, unique=unique)
+
+
+def downgrade() -> None:
+    for name, table, _, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,60 @@
+"""create initial tables
+
+Revision ID: a84fcecf415e
+Revises: 
+Create Date: 2026-10-18 09:12:40.118523
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a84fcecf415e'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # database.py 在导入时会执行 metadata.create_all，表可能已经存在
+    existing_tables = sa.inspect(op.get_bind()).get_table_names()
+
+    if "users" not in existing_tables:
+        op.create_table(
+            "users",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("email", sa.String(), unique=True),
+            sa.Column("password", sa.String()),
+        )
+    if "posts" not in existing_tables:
+        op.create_table(
+            "posts",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("body", sa.String()),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        )
+    if "comments" not in existing_tables:
+        op.create_table(
+            "comments",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("body", sa.String()),
+            sa.Column("post_id", sa.Integer(), sa.ForeignKey("posts.id"), nullable=False),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        )
+    if "likes" not in existing_tables:
+        op.create_table(
+            "likes",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("post_id", sa.Integer(), sa.ForeignKey("posts.id"), nullable=False),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("likes")
+    op.drop_table("comments")
+    op.drop_table("posts")
+    op.drop_table("users")
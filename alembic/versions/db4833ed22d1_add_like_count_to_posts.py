@@ -0,0 +1,47 @@
+"""add like_count to posts
+
+Revision ID: db4833ed22d1
+Revises: a84fcecf415e
+Create Date: 2026-10-18 09:31:05.402117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'db4833ed22d1'
+down_revision: Union[str, None] = 'a84fcecf415e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    columns = {column["name"] for column in inspector.get_columns("posts")}
+    indexes = {index["name"] for index in inspector.get_indexes("posts")}
+
+    # 添加反范式化的点赞数列，已有的帖子默认为0
+    if "like_count" not in columns:
+        op.add_column(
+            "posts",
+            sa.Column("like_count", sa.Integer(), nullable=False, server_default="0"),
+        )
+
+    # 回填已有帖子的点赞数
+    op.execute(
+        "UPDATE posts SET like_count = "
+        "(SELECT COUNT(*) FROM likes WHERE likes.post_id = posts.id)"
+    )
+
+    # 按点赞数排序时可以直接按索引顺序读取
+    if "ix_posts_like_count_id" not in indexes:
+        op.create_index("ix_posts_like_count_id", "posts", ["like_count", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_posts_like_count_id", table_name="posts")
+    with op.batch_alter_table("posts") as batch_op:
+        batch_op.drop_column("like_count")
@@ -0,0 +1,82 @@
+import time
+
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+
+class TTLCache:
+    """带过期时间的进程内 LRU 缓存，容量满时淘汰最久未使用的条目。"""
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        # 缓存的最大条目数
+        self.maxsize = maxsize
+        # 条目的默认存活时间，单位为秒
+        self.ttl = ttl
+        # 保存 key -> (过期时间, 值)，按最近使用的顺序排列
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        # 命中、未命中和淘汰次数
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        # 查找缓存条目
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return default
+
+        expires_at, value = item
+        # 条目已过期，删除并视为未命中
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return default
+
+        # 命中后将条目移动到末尾，表示最近使用过
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        # 条目的存活时间不超过缓存的默认存活时间
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        # 存活时间不大于0或缓存容量为0时不缓存
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+
+        # 超过容量时淘汰最久未使用的条目
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        # 删除并返回条目的值（忽略是否过期）
+        item = self._data.pop(key, None)
+        return default if item is None else item[1]
+
+    def remove_where(self, predicate: Callable[[Any], bool]) -> int:
+        # 删除所有值满足条件的条目，返回删除的条目数
+        keys = [key for key, (_, value) in self._data.items() if predicate(value)]
+        for key in keys:
+            del self._data[key]
+        return len(keys)
+
+    def clear(self) -> None:
+        # 清空所有条目
+        self._data.clear()
+
+    def stats(self) -> dict[str, int]:
+        # 返回缓存的统计信息
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def __len__(self) -> int:
+        return len(self._data)
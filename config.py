@@ -3,8 +3,8 @@
 
 # 导入BaseSettings和SettingsConfigDict类，用于定义配置类
 from pydantic_settings import BaseSettings, SettingsConfigDict
-# 导入Optional类，用于定义可选参数
-from typing import Optional
+# 导入Optional和Literal类，用于定义可选参数和枚举参数
+from typing import Literal, Optional
 # 导入lru_cache装饰器，用于缓存函数结果
 from functools import lru_cache
 
@@ -27,12 +27,68 @@ class GlobalConfig(BaseConfig):
     # 数据库回滚的标志位，默认为 False
     # 在数据库事务执行失败时，不会强制执行回滚操作
     DB_FORCE_ROLL_BACK: bool = False
+    # 连接池的最小连接数（PostgreSQL/asyncpg）
+    DB_POOL_MIN_SIZE: int = 1
+    # 连接池的最大连接数（PostgreSQL/asyncpg），限制对数据库的并发
+    DB_POOL_MAX_SIZE: int = 10
+    # 从连接池获取连接的超时时间（秒），超时返回503；设置为0表示不限制
+    DB_POOL_ACQUIRE_TIMEOUT: float = 10.0
+    # 单条语句的超时时间（秒，仅 PostgreSQL），设置为0表示不限制
+    DB_STATEMENT_TIMEOUT: float = 30.0
+    # SQLite 高吞吐模式：WAL、调优的 PRAGMA，以及读写分离（一个写连接 + 只读连接池）
+    # 读写分离需要 DB_FORCE_ROLL_BACK 为 False
+    SQLITE_TUNED: bool = False
+    # 等待其他连接释放锁的时间（毫秒）
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    # WAL 模式下使用 NORMAL，提交时不再每次 fsync
+    SQLITE_SYNCHRONOUS: Literal["OFF", "NORMAL", "FULL", "EXTRA"] = "NORMAL"
+    # 内存映射读取的大小（字节）
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+    # 每个连接的页缓存大小，负数表示 KiB（-64000 约为 64MB）
+    SQLITE_CACHE_SIZE: int = -64000
+    # 只读连接池的大小
+    SQLITE_READ_POOL_SIZE: int = 4
     # 可选的日志追踪 API 密钥
     # (很重要！！！) *** 如果 .env 文件中有 LOGTAIL_API_KEY 配置项，则使用该配置项，否则使用默认值 None ***
     LOGTAIL_API_KEY: Optional[str] = None
     # Sentry的DSN，用于错误追踪
     # (很重要！！！) *** 如果 .env 文件中有 SENTRY_DSN 配置项，则使用该配置项，否则使用默认值 None ***
     SENTRY_DSN: Optional[str] = None
+    # Sentry 追踪的默认采样比例（没有在 SENTRY_TRACES_SAMPLE_RATES 中配置的路由使用该比例）
+    SENTRY_TRACES_SAMPLE_RATE: float = 1.0
+    # Sentry 按路由配置的追踪采样比例，key 为 "方法 路径"，以 * 结尾的 key 按前缀匹配
+    SENTRY_TRACES_SAMPLE_RATES: dict[str, float] = {"GET /health*": 0.0}
+    # 被追踪的事务中进行性能分析的比例
+    SENTRY_PROFILES_SAMPLE_RATE: float = 1.0
+    # 列表接口（游标分页）默认每页返回的记录数
+    PAGE_SIZE_DEFAULT: int = 20
+    # 列表接口（游标分页）每页最多返回的记录数，防止单次请求扫描过多数据
+    PAGE_SIZE_MAX: int = 100
+    # 执行 bcrypt 密码哈希/校验的线程池大小，避免阻塞事件循环
+    PASSWORD_HASH_WORKERS: int = 2
+    # 线程池繁忙时最多允许排队的密码哈希/校验任务数，超过则直接返回503
+    PASSWORD_HASH_QUEUE_LIMIT: int = 32
+    # 已验证令牌 -> 用户 的进程内缓存的最大条目数，设置为0表示禁用缓存
+    PRINCIPAL_CACHE_SIZE: int = 1024
+    # 已验证令牌 -> 用户 的缓存存活时间（秒），不会超过令牌本身的过期时间
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    # 批量写入接口单次请求最多允许的条目数
+    BULK_MAX_ITEMS: int = 10000
+    # 批量写入时每条多行 INSERT 语句包含的行数，避免超过数据库的参数数量限制
+    BULK_CHUNK_SIZE: int = 500
+    # GET /post 响应缓存的最大条目数（每个排序方式和分页参数组合一个条目），设置为0表示禁用缓存
+    FEED_CACHE_SIZE: int = 256
+    # GET /post 响应缓存的存活时间（秒），限制多进程部署时其他进程的写入最多延迟多久可见
+    FEED_CACHE_TTL_SECONDS: int = 5
+    # 日志文件达到该大小（字节）时进行轮转
+    LOG_FILE_MAX_BYTES: int = 1024 * 1024
+    # 轮转时保留的旧日志文件个数
+    LOG_FILE_BACKUP_COUNT: int = 2
+    # 延迟格式化日志：入队时不格式化消息，SQL 语句等参数在后台线程真正输出时才编译成字符串
+    LOG_DEFERRED_FORMATTING: bool = True
+    # 按路由对 INFO 及以下级别的日志进行采样，key 为 "方法 路由模板"，值为保留的比例
+    # 例如 {"GET /post": 0.01} 表示只保留 1% 的 GET /post 请求的日志；未配置的路由全部保留
+    LOG_SAMPLE_RATES: dict[str, float] = {}
 
 
 # 定义开发环境的配置类，继承自 GlobalConfig
@@ -83,6 +139,17 @@ class ProdConfig(GlobalConfig):
     
     '''
 
+    # 生产环境只追踪少量请求，降低 Sentry 对请求延迟的影响
+    SENTRY_TRACES_SAMPLE_RATE: float = 0.05
+    # 登录接口全部追踪，帖子列表接口只追踪1%，健康检查接口不追踪
+    SENTRY_TRACES_SAMPLE_RATES: dict[str, float] = {
+        "POST /token": 1.0,
+        "GET /post": 0.01,
+        "GET /health*": 0.0,
+    }
+    # 生产环境只对少量被追踪的事务进行性能分析
+    SENTRY_PROFILES_SAMPLE_RATE: float = 0.1
+
     # 设置生产环境的环境变量前缀为 "PROD_"
     model_config = SettingsConfigDict(env_prefix="PROD_")
 
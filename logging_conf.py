@@ -1,6 +1,16 @@
+import atexit
+import copy
 import logging
+import queue
+import random
+
+from contextvars import ContextVar
 
 from logging.config import dictConfig
+from logging.handlers import QueueHandler, QueueListener
+
+from asgi_correlation_id import CorrelationIdFilter
+from fastapi import Request
 
 from config import DevConfig, config
 
@@ -28,29 +38,105 @@ class EmailObfuscationFilter(logging.Filter):
         # 返回True，表示该record需要被处理
         return True
 
+# 当前请求的 INFO 及以下级别的日志是否被采样保留
+request_logs_sampled: ContextVar[bool] = ContextVar("request_logs_sampled", default=True)
+
+
+class RouteSamplingFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        # WARNING 及以上级别的日志总是保留，其余日志按当前请求的采样结果保留
+        return record.levelno > logging.INFO or request_logs_sampled.get()
+
+
+# FastAPI 全局依赖：根据 LOG_SAMPLE_RATES 决定当前请求的日志是否保留
+# 在请求开始时决定一次，同一个请求的日志要么全部保留，要么全部丢弃
+async def sample_route_logs(request: Request) -> None:
+    route = request.scope.get("route")
+    if route is None:
+        return
+    rate = config.LOG_SAMPLE_RATES.get(f"{request.method} {route.path}")
+    if rate is not None:
+        request_logs_sampled.set(random.random() < rate)
+
+
+class DeferredQueueHandler(QueueHandler):
+    """入队时不格式化消息的 QueueHandler。
+
+    默认的 QueueHandler 在入队前会把 msg % args 格式化成字符串，
+    logger.debug(query) 这样的调用会在事件循环中编译 SQL 语句。
+    队列只在进程内使用，不需要序列化，因此保留原始的 msg 和 args，
+    由后台线程中的处理器在真正输出时再格式化。
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return copy.copy(record)
+
+
 # 定义日志处理器
 handlers = ["default", "rotating_file"]
 # 如果当前环境是生产环境，则添加logtail处理器
 if config.ENV_STATE == "prod":
     handlers = ["default", "rotating_file", "logtail"]
 
+# 应用自身的日志记录器（各模块使用 logging.getLogger(__name__)）
+APP_LOGGERS = ["RESTful", "main", "security", "database", "routers"]
+
+# 当前运行中的日志监听线程
+listeners: list[QueueListener] = []
+
+
+# 停止所有日志监听线程，停止前会处理完队列中剩余的日志
+def stop_logging() -> None:
+    while listeners:
+        listeners.pop().stop()
+
+
+# 将日志记录器的处理器移到后台线程中执行：
+# 记录器只保留一个 QueueHandler，日志在事件循环中只做过滤和入队，
+# 文件轮转、JSON 编码和网络发送都由 QueueListener 在后台线程中完成。
+# 处理器相同的记录器共用一个队列和监听线程。
+def install_queue_handlers(logger_names: list[str], filters: list[logging.Filter]) -> None:
+    queue_handlers: dict[tuple[logging.Handler, ...], QueueHandler] = {}
+    for name in logger_names:
+        logger = logging.getLogger(name)
+        logger_handlers = tuple(logger.handlers)
+        if not logger_handlers:
+            continue
+        for handler in logger_handlers:
+            logger.removeHandler(handler)
+
+        queue_handler = queue_handlers.get(logger_handlers)
+        if queue_handler is None:
+            queue_handler_class = (
+                DeferredQueueHandler if config.LOG_DEFERRED_FORMATTING else QueueHandler
+            )
+            queue_handler = queue_handler_class(queue.SimpleQueue())
+            # 过滤器（关联ID、邮箱混淆）只在入队前执行一次，而不是每个处理器执行一次；
+            # 关联ID保存在 contextvar 中，必须在产生日志的协程中读取
+            for log_filter in filters:
+                queue_handler.addFilter(log_filter)
+            listener = QueueListener(
+                queue_handler.queue, *logger_handlers, respect_handler_level=True
+            )
+            listener.start()
+            listeners.append(listener)
+            queue_handlers[logger_handlers] = queue_handler
+
+        logger.addHandler(queue_handler)
+
+
+# 进程退出时处理完队列中剩余的日志
+atexit.register(stop_logging)
+
 
 def configure_logging() -> None:
+    # 重复配置时先停止之前的监听线程
+    stop_logging()
+
     dictConfig(
         {
             "version": 1,
             "disable_existing_loggers": False,
-            "filters": {
-                "correlation_id": {
-                    "()": "asgi_correlation_id.CorrelationIdFilter",
-                    "uuid_length": 8 if isinstance(config, DevConfig) else 32,
-                    "default_value": "-",
-                },
-                "email_obfuscation": {
-                    "()": EmailObfuscationFilter,
-                    "obfuscated_length": 2 if isinstance(config, DevConfig) else 0,
-                },
-            },
             "formatters": {
                 "console": {
                     "class": "logging.Formatter",
@@ -70,36 +156,48 @@ def configure_logging() -> None:
                     "class": "rich.logging.RichHandler",  # could use logging.StreamHandler instead
                     "level": "DEBUG",
                     "formatter": "console",
-                    "filters": ["correlation_id", "email_obfuscation"],
                 },
                 "logtail": {
                     # https://betterstack.com/docs/logs/python/
                     "class": "logtail.LogtailHandler",
                     "level": "DEBUG",
                     "formatter": "console",
-                    "filters": ["correlation_id", "email_obfuscation"],
                     "source_token": config.LOGTAIL_API_KEY,  # gets passed to LogtailHandler constructor as kwargs
                 },
                 "rotating_file": {
                     "class": "logging.handlers.RotatingFileHandler",
                     "level": "DEBUG",
                     "formatter": "file",
-                    "filters": ["correlation_id", "email_obfuscation"],
                     "filename": "RESTful.log",
-                    "maxBytes": 1024 * 1024,  # 1 MB
-                    "backupCount": 2,
+                    "maxBytes": config.LOG_FILE_MAX_BYTES,
+                    "backupCount": config.LOG_FILE_BACKUP_COUNT,
                     "encoding": "utf8",
                 },
             },
             "loggers": {
                 "uvicorn": {"handlers": ["default", "rotating_file"], "level": "INFO"},
-                "RESTful": {
-                    "handlers": handlers,
-                    "level": "DEBUG" if isinstance(config, DevConfig) else "INFO",
-                    "propagate": False,
+                **{
+                    name: {
+                        "handlers": handlers,
+                        "level": "DEBUG" if isinstance(config, DevConfig) else "INFO",
+                        "propagate": False,
+                    }
+                    for name in APP_LOGGERS
                 },
                 "databases": {"handlers": ["default"], "level": "WARNING"},
                 "aiosqlite": {"handlers": ["default"], "level": "WARNING"},
             },
         }
     )
+
+    # 所有记录器共用的过滤器实例，采样过滤器放在最前面，被丢弃的日志不再做其他处理
+    filters = [
+        RouteSamplingFilter(),
+        CorrelationIdFilter(
+            uuid_length=8 if isinstance(config, DevConfig) else 32, default_value="-"
+        ),
+        EmailObfuscationFilter(obfuscated_length=2 if isinstance(config, DevConfig) else 0),
+    ]
+    install_queue_handlers(
+        ["uvicorn", *APP_LOGGERS, "databases", "aiosqlite"], filters
+    )
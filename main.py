@@ -1,23 +1,24 @@
 # 导入 logging模块
 import logging
-# 导入sentry_sdk模块
-import sentry_sdk
 
 # 导入 asgi_correlation_id 模块
 from asgi_correlation_id import CorrelationIdMiddleware
 # 导入FastAPI模块
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, HTTPException
 from fastapi.exception_handlers import http_exception_handler
+from fastapi.responses import JSONResponse
 
 # 导入数据库模块
-from database import database
-# 从config模块中导入config变量
-from config import config
+from database import PoolTimeoutError, database
 # 导入路由模块
 from routers.post import router as post_router
 from routers.user import router as user_router
 # 导入 configure_logging 模块
-from logging_conf import configure_logging
+from logging_conf import configure_logging, sample_route_logs, stop_logging
+# 导入关闭密码哈希线程池的函数
+from security import shutdown_password_executor
+# 导入初始化 Sentry 的函数
+from tracing import init_sentry
 # 导入asynccontextmanager模块
 from contextlib import asynccontextmanager
 
@@ -34,16 +35,8 @@ pip3 install -r requirements.txt
 This will install the packages from the requirements.txt for this project.
 '''
 
-sentry_sdk.init(
-    dsn=config.SENTRY_DSN,
-    # Set traces_sample_rate to 1.0 to capture 100%
-    # of transactions for tracing.
-    traces_sample_rate=1.0,
-    # Set profiles_sample_rate to 1.0 to profile 100%
-    # of sampled transactions.
-    # We recommend adjusting this value in production.
-    profiles_sample_rate=1.0,
-)
+# 初始化 Sentry，采样比例在 config 中按路由配置；没有配置 SENTRY_DSN 时跳过
+init_sentry()
 
 # 获取当前模块的日志记录器
 logger = logging.getLogger(__name__)
@@ -60,9 +53,13 @@ async def lifespan(app: FastAPI):
     yield
     # 上下文管理器结束，断开数据库连接
     await database.disconnect()
+    # 关闭密码哈希线程池
+    shutdown_password_executor()
+    # 停止日志监听线程，处理完队列中剩余的日志
+    stop_logging()
 
-# 创建一个FastAPI实例
-app = FastAPI(lifespan=lifespan)
+# 创建一个FastAPI实例，全局依赖sample_route_logs按路由对请求日志进行采样
+app = FastAPI(lifespan=lifespan, dependencies=[Depends(sample_route_logs)])
 # 添加一个中间件，用于添加一个关联ID
 app.add_middleware(CorrelationIdMiddleware)
 
@@ -71,10 +68,32 @@ app.include_router(post_router)
 # 将user_router路由器添加到app中
 app.include_router(user_router)
 
+# 健康检查接口，供负载均衡器和容器编排探测使用
+@app.get("/health")
+async def health():
+    return {"status": "ok"}
+
+# 数据库连接池的使用情况
+@app.get("/health/database")
+async def database_health():
+    return database.pool_stats()
+
 # 定义一个全局异常处理函数
 @app.exception_handler(HTTPException)
 async def http_exception_handle_logging(request, exc):
     # 记录异常信息
-    logger.error(f"HTTP Exception: {exc.status_code} {exc.detail}")
+    logger.error("HTTP Exception: %s %s", exc.status_code, exc.detail)
+    # 返回异常信息
+    return await http_exception_handler(request, exc)
+
+# 从连接池获取连接超时，说明数据库已经满负荷，返回503让客户端稍后重试
+@app.exception_handler(PoolTimeoutError)
+async def pool_timeout_handler(request, exc):
+    # 记录异常信息
+    logger.warning("Database pool timeout: %s", exc)
     # 返回异常信息
-    return await http_exception_handler(request, exc)
\ No newline at end of file
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Database is busy, please retry later"},
+        headers={"Retry-After": "1"},
+    )
@@ -50,6 +50,17 @@ class PostLike(PostLikeIn):
     id: int 
     user_id: int
 
+# 定义批量写入接口中单个条目的结果模型
+class BulkItemResult(BaseModel):
+    # 条目在请求数组中的下标
+    index: int
+    # 条目的处理结果，与单条写入接口的状态码一致
+    status: int
+    # 写入成功时，新记录的id
+    id: int | None = None
+    # 写入失败时，失败的原因
+    detail: str | None = None
+
 # {
 #     "post": {"id": 0, "body": "My post"},
 #     "comments": [{"id": 2, "post_id": 0, "body": "My comment"}],
@@ -0,0 +1,45 @@
+import base64
+import binascii
+import json
+
+from fastapi import HTTPException, status
+
+# 下一页游标通过响应头返回，保持列表接口的响应体仍然是一个数组
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# 定义一个HTTPException异常，状态码为400，详细信息为“Invalid cursor”
+invalid_cursor_exception = HTTPException(
+    status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+)
+
+
+# 将游标中的键值对编码为不透明的字符串，客户端只需原样传回
+def encode_cursor(values: dict) -> str:
+    # 使用紧凑的 JSON 表示游标内容
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    # 使用 URL 安全的 base64 编码，并去掉末尾的填充字符
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+# 将客户端传回的游标解码为键值对，并校验必须包含的整数字段
+def decode_cursor(cursor: str, *int_fields: str) -> dict:
+    try:
+        # 补齐 base64 的填充字符后再解码
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    # 游标不是合法的 base64 或 JSON 时，返回400错误
+    except (binascii.Error, ValueError) as e:
+        raise invalid_cursor_exception from e
+
+    # 游标必须是一个字典
+    if not isinstance(values, dict):
+        raise invalid_cursor_exception
+
+    # 游标中必须包含所有整数字段（bool 也是 int 的子类，需要排除）
+    for field in int_fields:
+        value = values.get(field)
+        if not isinstance(value, int) or isinstance(value, bool):
+            raise invalid_cursor_exception
+
+    # 返回解码后的游标内容
+    return values
@@ -1,3 +1,4 @@
+import hashlib
 import logging
 import sqlalchemy
 
@@ -5,9 +6,14 @@ from models.user import User
 from security import get_current_user
 from enum import Enum
 from typing import Annotated
-from fastapi import APIRouter, Depends, HTTPException
-from database import comment_table, database, like_table, post_table
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, Response
+from pydantic import TypeAdapter
+from cache import TTLCache
+from config import config
+from database import comment_table, database, integrity_errors, like_table, post_table
+from pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
 from models.post import (
+    BulkItemResult,
     Comment,
     CommentIn,
     PostLike,
@@ -24,6 +30,17 @@ router = APIRouter()
 # 获取当前模块的日志记录器
 logger = logging.getLogger(__name__)
 
+# GET /post 的响应缓存，key为(排序方式, 每页数量, 游标)，值为(ETag, 响应体, 下一页的游标)
+feed_cache = TTLCache(maxsize=config.FEED_CACHE_SIZE, ttl=config.FEED_CACHE_TTL_SECONDS)
+
+# 用于校验和序列化帖子列表的TypeAdapter
+post_list_adapter = TypeAdapter(list[UserPostWithLikes])
+
+
+# 帖子列表发生变化（创建帖子、点赞）时清空响应缓存
+def invalidate_feed_cache() -> None:
+    feed_cache.clear()
+
 '''
 select_post_and_likes 可能的结果如下：
 
@@ -36,21 +53,26 @@ select_post_and_likes 可能的结果如下：
 | 4  | "Fourth Post"   | 7     |
 +----+-----------------+-------+
 
+likes 直接读取 posts.like_count 列，不再对 likes 表做外连接和 COUNT 聚合，
+因此读取一个帖子的开销与它的点赞数无关。
+
 '''
 
-# 从post_table和like_table中选择post_table和like_table.c.id的count，并将count命名为likes
-select_post_and_likes = (
-    sqlalchemy.select(post_table, sqlalchemy.func.count(like_table.c.id).label("likes"))
-    # 将post_table和like_table进行外连接
-    .select_from(post_table.outerjoin(like_table))
-    # 按照post_table.c.id进行分组
-    .group_by(post_table.c.id)
+# 帖子的点赞数，由like_post在插入点赞记录时维护
+post_likes_count = post_table.c.like_count
+
+# 从post_table中选择帖子的各列，并将like_count命名为likes
+select_post_and_likes = sqlalchemy.select(
+    post_table.c.id,
+    post_table.c.body,
+    post_table.c.user_id,
+    post_likes_count.label("likes"),
 )
 
 # 根据post_id查找帖子
 async def find_post(post_id: int):
     # 记录查找帖子的日志
-    logger.info(f"Finding post with id {post_id}")
+    logger.info("Finding post with id %s", post_id)
 
     # 构建查询语句，查找id为post_id的帖子
     query = post_table.select().where(post_table.c.id == post_id)
@@ -110,6 +132,8 @@ async def create_post(
 
     # 执行插入语句，返回最后一条记录的id
     last_record_id = await database.execute(query)
+    # 帖子列表发生变化，清空响应缓存
+    invalidate_feed_cache()
     # 返回插入的数据，包括id
     return {**data, "id": last_record_id}
 
@@ -121,12 +145,49 @@ class PostSorting(str, Enum):
     # 按点赞数排序方式
     most_likes = "most_likes"
 
-# 获取所有帖子
-@router.get("/post", response_model=list[UserPostWithLikes])
-async def get_all_posts(sorting: PostSorting = PostSorting.new): #http://api.com/post?sorting=most_likes
-    # 记录获取所有帖子的日志
-    logger.info("Getting all posts")
+# 根据排序方式和当前页的最后一条记录生成下一页的游标
+def encode_post_cursor(sorting: PostSorting, post) -> str:
+    # 按点赞数排序时，游标需要同时记录点赞数和帖子id（id用于打破点赞数相同的情况）
+    if sorting == PostSorting.most_likes:
+        return encode_cursor({"sorting": sorting.value, "likes": post.likes, "id": post.id})
+    # 按新旧排序时，游标只需要记录帖子id
+    return encode_cursor({"sorting": sorting.value, "id": post.id})
 
+
+# 在查询语句上应用游标条件，使每一页都是一次有界的范围扫描
+def apply_post_cursor(query, sorting: PostSorting, cursor: str):
+    # 按点赞数排序的游标需要包含likes和id两个整数字段
+    if sorting == PostSorting.most_likes:
+        values = decode_cursor(cursor, "likes", "id")
+    else:
+        values = decode_cursor(cursor, "id")
+
+    # 游标只能用于生成它的排序方式，否则返回400错误
+    if values.get("sorting") != sorting.value:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    match sorting:
+        case PostSorting.new:
+            # 下一页是id更小的帖子
+            return query.where(post_table.c.id < values["id"])
+        case PostSorting.old:
+            # 下一页是id更大的帖子
+            return query.where(post_table.c.id > values["id"])
+        case PostSorting.most_likes:
+            # 下一页是点赞数更少的帖子，或点赞数相同但id更小的帖子
+            return query.where(
+                sqlalchemy.or_(
+                    post_likes_count < values["likes"],
+                    sqlalchemy.and_(
+                        post_likes_count == values["likes"],
+                        post_table.c.id < values["id"],
+                    ),
+                )
+            )
+
+
+# 查询一页帖子，返回当前页的帖子和下一页的游标（没有下一页时为None）
+async def fetch_posts_page(sorting: PostSorting, limit: int, cursor: str | None):
     # 构建查询语句，查询帖子及其点赞数
     match sorting:
         case PostSorting.new:
@@ -136,17 +197,81 @@ async def get_all_posts(sorting: PostSorting = PostSorting.new): #http://api.com
             # 查询帖子及其点赞数，并按帖子id升序排列
             query = select_post_and_likes.order_by(post_table.c.id.asc())
         case PostSorting.most_likes:
-            # 按照点赞数降序排列查询结果
-            query = select_post_and_likes.order_by(sqlalchemy.desc("likes"))
+            # 按照点赞数降序排列查询结果，点赞数相同时按帖子id降序排列（使用ix_posts_like_count_id索引）
+            query = select_post_and_likes.order_by(
+                post_likes_count.desc(), post_table.c.id.desc()
+            )
         case _:
             # 默认情况，可以选择抛出异常或使用默认排序
             raise ValueError(f"Unsupported sorting option: {sorting}")
 
+    # 如果客户端传入了游标，则只查询游标之后的帖子
+    if cursor is not None:
+        query = apply_post_cursor(query, sorting, cursor)
+
+    # 多查询一条记录，用于判断是否还有下一页
+    query = query.limit(limit + 1)
+
     # 记录查询语句的日志
     logger.debug(query)
 
-    # 执行查询语句，返回结果
-    return await database.fetch_all(query)
+    # 执行查询语句
+    posts = await database.fetch_all(query)
+
+    # 如果还有下一页，则截断结果并生成下一页的游标
+    if len(posts) > limit:
+        posts = posts[:limit]
+        return posts, encode_post_cursor(sorting, posts[-1])
+    return posts, None
+
+
+# 判断客户端的If-None-Match请求头是否与当前的ETag匹配（弱比较）
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if if_none_match is None:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+# 获取所有帖子（基于游标的分页，下一页的游标通过X-Next-Cursor响应头返回）
+# 响应会被缓存，直到create_post或like_post修改了帖子列表；客户端可以使用If-None-Match进行条件请求
+@router.get("/post", response_model=list[UserPostWithLikes])
+async def get_all_posts(
+    sorting: PostSorting = PostSorting.new, #http://api.com/post?sorting=most_likes
+    limit: Annotated[int, Query(ge=1, le=config.PAGE_SIZE_MAX)] = config.PAGE_SIZE_DEFAULT,
+    cursor: str | None = None,
+    if_none_match: Annotated[str | None, Header()] = None,
+):
+    # 记录获取所有帖子的日志
+    logger.info("Getting all posts")
+
+    # 缓存的key由排序方式和分页参数组成
+    key = (sorting.value, limit, cursor)
+    cached = feed_cache.get(key)
+
+    # 缓存未命中时查询数据库，并将序列化后的响应体缓存起来
+    if cached is None:
+        posts, next_cursor = await fetch_posts_page(sorting, limit, cursor)
+        body = post_list_adapter.dump_json(
+            post_list_adapter.validate_python(posts, from_attributes=True)
+        )
+        # ETag是响应体的哈希，不同进程对相同内容生成相同的ETag
+        etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+        cached = (etag, body, next_cursor)
+        feed_cache.set(key, cached)
+
+    etag, body, next_cursor = cached
+    # 要求客户端每次都重新验证缓存
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if next_cursor is not None:
+        headers[NEXT_CURSOR_HEADER] = next_cursor
+
+    # 客户端缓存的内容没有变化，返回304且不返回响应体
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    # 返回当前页的帖子
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
 # 创建评论
@@ -177,43 +302,102 @@ async def create_comment(
     return {**data, "id": last_record_id}
 
 
-# 获取指定post_id的评论
+# 查询指定帖子的一页评论（按评论id升序），多查询一条用于判断是否还有下一页
+def select_comments_page(post_id: int, limit: int, cursor: str | None = None):
+    query = (
+        comment_table.select()
+        .where(comment_table.c.post_id == post_id)
+        .order_by(comment_table.c.id.asc())
+        .limit(limit + 1)
+    )
+    # 如果客户端传入了游标，则只查询游标之后的评论
+    if cursor is not None:
+        query = query.where(comment_table.c.id > decode_cursor(cursor, "id")["id"])
+    return query
+
+
+# 如果还有下一页，则截断评论并通过响应头返回下一页的游标
+def paginate_comments(comments: list, limit: int, response: Response) -> list:
+    if len(comments) > limit:
+        comments = comments[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor({"id": comments[-1]["id"]})
+    return comments
+
+
+# 获取指定post_id的评论（基于游标的分页，下一页的游标通过X-Next-Cursor响应头返回）
 @router.get("/post/{post_id}/comment", response_model=list[Comment])
-async def get_comments_on_post(post_id: int):
+async def get_comments_on_post(
+    post_id: int,
+    response: Response,
+    limit: Annotated[int, Query(ge=1, le=config.PAGE_SIZE_MAX)] = config.PAGE_SIZE_DEFAULT,
+    cursor: str | None = None,
+):
     # 打印日志
     logger.info("Getting comments on post")
 
-    # 查询comment_table表中post_id为post_id的记录
-    query = comment_table.select().where(comment_table.c.post_id == post_id)
+    # 查询comment_table表中post_id为post_id的一页记录
+    query = select_comments_page(post_id, limit, cursor)
 
     # 打印查询语句
     logger.debug(query)
 
-    # 执行查询语句，并返回所有记录
-    return await database.fetch_all(query)
+    # 执行查询语句，并返回当前页的记录
+    comments = await database.fetch_all(query)
+    return paginate_comments(comments, limit, response)
 
 
-# 获取指定post_id的post及其评论
+# 获取指定post_id的post及其第一页评论，只需要一次数据库往返
 @router.get("/post/{post_id}", response_model=UserPostWithComments)
-async def get_post_with_comments(post_id: int):
+async def get_post_with_comments(
+    post_id: int,
+    response: Response,
+    limit: Annotated[int, Query(ge=1, le=config.PAGE_SIZE_MAX)] = config.PAGE_SIZE_DEFAULT,
+):
     # 打印日志
     logger.info("Getting post and its comments")
 
-    # 根据post_id查询post_table和likes_table中的数据
-    query = select_post_and_likes.where(post_table.c.id == post_id)
+    # 第一页评论作为子查询
+    comments_page = select_comments_page(post_id, limit).subquery()
+    # 将帖子与第一页评论进行外连接，帖子没有评论时也会返回一行
+    query = (
+        select_post_and_likes.add_columns(
+            comments_page.c.id.label("comment_id"),
+            comments_page.c.body.label("comment_body"),
+            comments_page.c.user_id.label("comment_user_id"),
+        )
+        .select_from(
+            post_table.outerjoin(comments_page, comments_page.c.post_id == post_table.c.id)
+        )
+        .where(post_table.c.id == post_id)
+        .order_by(comments_page.c.id.asc())
+    )
 
     # 打印查询语句
     logger.debug(query)
 
-    # 执行查询语句，获取一条数据
-    post = await database.fetch_one(query)
+    # 执行查询语句，每一行是帖子和它的一条评论
+    rows = await database.fetch_all(query)
 
-    if not post:
+    if not rows:
         raise HTTPException(status_code=404, detail="Post not found")
 
+    # 帖子的数据在每一行中都相同，取第一行即可
+    post = rows[0]
+    # 外连接没有匹配到评论时，评论的列为NULL
+    comments = [
+        {
+            "id": row.comment_id,
+            "body": row.comment_body,
+            "post_id": post.id,
+            "user_id": row.comment_user_id,
+        }
+        for row in rows
+        if row.comment_id is not None
+    ]
+
     return {
-        "post": post,
-        "comments": await get_comments_on_post(post_id),
+        "post": {"id": post.id, "body": post.body, "user_id": post.user_id, "likes": post.likes},
+        "comments": paginate_comments(comments, limit, response),
     }
 
 
@@ -237,12 +421,186 @@ async def like_post(
 
     # 构建插入数据库的查询语句
     query = like_table.insert().values(data)
+    # 构建更新帖子点赞数的语句，在数据库中原子地加一
+    update_count_query = (
+        post_table.update()
+        .where(post_table.c.id == like.post_id)
+        .values(like_count=post_table.c.like_count + 1)
+    )
 
     # 记录日志，表示查询语句
     logger.debug(query)
 
-    # 执行查询语句，返回最后一条记录的id
-    last_record_id = await database.execute(query)
+    try:
+        # 在同一个事务中插入点赞记录并更新点赞数，保证两者一致
+        async with database.transaction():
+            # 执行查询语句，返回最后一条记录的id
+            last_record_id = await database.execute(query)
+            # 更新帖子的点赞数
+            await database.execute(update_count_query)
+    # 违反(post_id, user_id)唯一约束，说明该用户已经点赞过该帖子
+    except integrity_errors as e:
+        raise HTTPException(status_code=409, detail="Post already liked") from e
+
+    # 帖子的点赞数发生变化，清空响应缓存
+    invalidate_feed_cache()
 
     # 返回点赞数据，包括id
-    return {**data, "id": last_record_id}
\ No newline at end of file
+    return {**data, "id": last_record_id}
+
+
+# 将列表按固定大小分块，避免单条语句的参数数量超过数据库的限制
+def chunked(items: list, size: int):
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+# 批量插入数据，每块使用一条多行INSERT ... RETURNING语句，返回按插入顺序排列的id
+async def insert_many(table: sqlalchemy.Table, rows: list[dict]) -> list[int]:
+    ids = []
+    for chunk in chunked(rows, config.BULK_CHUNK_SIZE):
+        # 构建多行插入语句，并返回新记录的id
+        query = table.insert().values(chunk).returning(table.c.id)
+
+        # 记录插入语句的日志
+        logger.debug(query)
+
+        # 同一条语句中的id按插入顺序递增分配
+        records = await database.fetch_all(query)
+        ids += sorted(record.id for record in records)
+    return ids
+
+
+# 批量查询帖子id中实际存在的帖子id
+async def find_existing_post_ids(post_ids: set[int]) -> set[int]:
+    existing = set()
+    for chunk in chunked(list(post_ids), config.BULK_CHUNK_SIZE):
+        # 构建查询语句，查询id在chunk中的帖子
+        query = sqlalchemy.select(post_table.c.id).where(post_table.c.id.in_(chunk))
+
+        # 记录查询语句的日志
+        logger.debug(query)
+
+        existing.update(record.id for record in await database.fetch_all(query))
+    return existing
+
+
+# 批量创建帖子
+@router.post("/post/bulk", response_model=list[BulkItemResult])
+async def create_posts_bulk(
+    posts: Annotated[list[UserPostIn], Body(max_length=config.BULK_MAX_ITEMS)],
+    current_user: Annotated[User, Depends(get_current_user)],
+):
+    # 记录批量创建帖子的日志
+    logger.info("Creating %d posts", len(posts))
+
+    # 将每个帖子和current_user的id合并为一个字典
+    rows = [{**post.model_dump(), "user_id": current_user.id} for post in posts]
+
+    # 在同一个事务中插入所有帖子
+    async with database.transaction():
+        ids = await insert_many(post_table, rows)
+
+    # 帖子列表发生变化，清空响应缓存
+    invalidate_feed_cache()
+
+    # 返回每个帖子的结果
+    return [
+        BulkItemResult(index=index, status=201, id=post_id)
+        for index, post_id in enumerate(ids)
+    ]
+
+
+# 批量创建评论
+@router.post("/comment/bulk", response_model=list[BulkItemResult])
+async def create_comments_bulk(
+    comments: Annotated[list[CommentIn], Body(max_length=config.BULK_MAX_ITEMS)],
+    current_user: Annotated[User, Depends(get_current_user)],
+):
+    # 记录批量创建评论的日志
+    logger.info("Creating %d comments", len(comments))
+
+    results: list[BulkItemResult | None] = [None] * len(comments)
+    # 需要插入的评论在请求数组中的下标和数据
+    indexes, rows = [], []
+
+    # 在同一个事务中检查帖子是否存在并插入评论
+    async with database.transaction():
+        existing = await find_existing_post_ids({comment.post_id for comment in comments})
+
+        for index, comment in enumerate(comments):
+            # 帖子不存在的评论不插入
+            if comment.post_id not in existing:
+                results[index] = BulkItemResult(index=index, status=404, detail="Post not found")
+                continue
+            indexes.append(index)
+            rows.append({**comment.model_dump(), "user_id": current_user.id})
+
+        ids = await insert_many(comment_table, rows)
+
+    # 填入插入成功的评论的结果
+    for index, comment_id in zip(indexes, ids):
+        results[index] = BulkItemResult(index=index, status=201, id=comment_id)
+    return results
+
+
+# 批量点赞帖子
+@router.post("/like/bulk", response_model=list[BulkItemResult])
+async def like_posts_bulk(
+    likes: Annotated[list[PostLikeIn], Body(max_length=config.BULK_MAX_ITEMS)],
+    current_user: Annotated[User, Depends(get_current_user)],
+):
+    # 记录批量点赞的日志
+    logger.info("Liking %d posts", len(likes))
+
+    results: list[BulkItemResult | None] = [None] * len(likes)
+    # 需要插入的点赞在请求数组中的下标和数据
+    indexes, rows = [], []
+
+    # 在同一个事务中检查帖子和已有点赞，插入点赞并更新点赞数
+    async with database.transaction():
+        post_ids = {like.post_id for like in likes}
+        existing = await find_existing_post_ids(post_ids)
+
+        # 查询当前用户已经点赞过的帖子
+        liked = set()
+        for chunk in chunked(list(existing), config.BULK_CHUNK_SIZE):
+            query = sqlalchemy.select(like_table.c.post_id).where(
+                like_table.c.user_id == current_user.id, like_table.c.post_id.in_(chunk)
+            )
+            logger.debug(query)
+            liked.update(record.post_id for record in await database.fetch_all(query))
+
+        for index, like in enumerate(likes):
+            # 帖子不存在的点赞不插入
+            if like.post_id not in existing:
+                results[index] = BulkItemResult(index=index, status=404, detail="Post not found")
+                continue
+            # 已经点赞过（包括同一请求中重复的点赞）的不插入
+            if like.post_id in liked:
+                results[index] = BulkItemResult(index=index, status=409, detail="Post already liked")
+                continue
+            liked.add(like.post_id)
+            indexes.append(index)
+            rows.append({**like.model_dump(), "user_id": current_user.id})
+
+        ids = await insert_many(like_table, rows)
+
+        # 每个帖子在本次请求中最多新增一个点赞，点赞数加一
+        for chunk in chunked([row["post_id"] for row in rows], config.BULK_CHUNK_SIZE):
+            query = (
+                post_table.update()
+                .where(post_table.c.id.in_(chunk))
+                .values(like_count=post_table.c.like_count + 1)
+            )
+            logger.debug(query)
+            await database.execute(query)
+
+    # 帖子的点赞数发生变化，清空响应缓存
+    if ids:
+        invalidate_feed_cache()
+
+    # 填入插入成功的点赞的结果
+    for index, like_id in zip(indexes, ids):
+        results[index] = BulkItemResult(index=index, status=201, id=like_id)
+    return results
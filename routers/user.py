@@ -1,7 +1,13 @@
 import logging
 from fastapi import APIRouter, HTTPException, status
 from models.user import UserIn
-from security import get_password_hash, get_user, authenticate_user, create_access_token
+from security import (
+    get_password_hash_async,
+    get_user,
+    authenticate_user,
+    create_access_token,
+    invalidate_user_principals,
+)
 from database import database, user_table
 
 # 获取当前模块的logger对象
@@ -21,8 +27,8 @@ async def register(user: UserIn):
             detail="A user with that email already exists",
         )
     
-    # 获取用户输入的密码，并对其进行哈希处理
-    hashed_password = get_password_hash(user.password)
+    # 获取用户输入的密码，并在线程池中对其进行哈希处理
+    hashed_password = await get_password_hash_async(user.password)
     # 创建一个插入数据库的查询语句，插入用户的邮箱和密码
     query = user_table.insert().values(
         email=user.email, password=hashed_password
@@ -33,6 +39,8 @@ async def register(user: UserIn):
 
     # 执行查询语句，将用户信息插入数据库
     await database.execute(query)
+    # 用户记录发生变化，删除该用户已缓存的令牌
+    invalidate_user_principals(user.email)
     # 返回用户创建成功的提示信息
     return {"detail": "User created."}
 
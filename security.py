@@ -1,5 +1,7 @@
 import os
 
+import asyncio
+
 import logging 
 
 from typing import Annotated
@@ -8,12 +10,20 @@ from jose import jwt, ExpiredSignatureError, JWTError
 
 import datetime
 
+import time
+
 from passlib.context import CryptContext
 
+from concurrent.futures import ThreadPoolExecutor
+
 from fastapi.security import OAuth2PasswordBearer
 
 from fastapi import Depends, HTTPException, status
 
+from cache import TTLCache
+
+from config import config
+
 from database import database, user_table
 
 # 获取logger对象
@@ -35,6 +45,23 @@ credentials_exception = HTTPException(
     headers={"WWW-Authenticate": "Bearer"}
 )
 
+# 定义一个HTTPException异常，状态码为503，表示密码哈希线程池已满，客户端稍后重试
+password_hash_busy_exception = HTTPException(
+    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+    detail="Server is busy, please retry later",
+    headers={"Retry-After": "1"},
+)
+
+# 执行 bcrypt 的线程池，首次使用时创建
+password_executor: ThreadPoolExecutor | None = None
+# 正在执行和排队中的密码哈希/校验任务数
+password_tasks_pending = 0
+
+# 已验证的令牌 -> 用户 的缓存，命中时get_current_user不需要再查询数据库
+principal_cache = TTLCache(
+    maxsize=config.PRINCIPAL_CACHE_SIZE, ttl=config.PRINCIPAL_CACHE_TTL_SECONDS
+)
+
 # 定义一个函数，用于获取access token的过期时间，单位为分钟
 def access_token_expire_minutes() -> int:
     # 返回access token的过期时间为30分钟
@@ -63,6 +90,45 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     # 使用pwd_context.verify()方法验证密码是否正确
     return pwd_context.verify(plain_password, hashed_password)
 
+# 获取执行 bcrypt 的线程池，首次调用时按配置的大小创建
+def get_password_executor() -> ThreadPoolExecutor:
+    global password_executor
+    if password_executor is None:
+        password_executor = ThreadPoolExecutor(
+            max_workers=config.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+        )
+    return password_executor
+
+# 关闭 bcrypt 线程池，在应用关闭时调用
+def shutdown_password_executor() -> None:
+    global password_executor
+    if password_executor is not None:
+        password_executor.shutdown(wait=True)
+        password_executor = None
+
+# 在线程池中执行 bcrypt 计算，线程池和队列都已满时直接返回503，而不是无限排队
+async def run_password_task(func, *args):
+    global password_tasks_pending
+    # 正在执行的任务数加上排队的任务数超过上限，拒绝请求
+    if password_tasks_pending >= config.PASSWORD_HASH_WORKERS + config.PASSWORD_HASH_QUEUE_LIMIT:
+        logger.warning("Password hashing queue is full")
+        raise password_hash_busy_exception
+    password_tasks_pending += 1
+    try:
+        # bcrypt 计算期间会释放 GIL，事件循环可以继续处理其他请求
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_password_executor(), func, *args)
+    finally:
+        password_tasks_pending -= 1
+
+# 定义一个异步函数，在线程池中获取密码的哈希值
+async def get_password_hash_async(password: str) -> str:
+    return await run_password_task(get_password_hash, password)
+
+# 定义一个异步函数，在线程池中验证密码是否正确
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await run_password_task(verify_password, plain_password, hashed_password)
+
 # 定义一个异步函数，用于从数据库中获取用户信息
 async def get_user(email: str):
     # 记录调试信息，表示正在从数据库中获取用户信息，并传入email参数
@@ -76,6 +142,10 @@ async def get_user(email: str):
     if result:
         return result 
     
+# 用户记录发生变化时，删除该用户所有已缓存的令牌
+def invalidate_user_principals(email: str) -> None:
+    principal_cache.remove_where(lambda user: user.email == email)
+    
 # 定义一个异步函数，用于验证用户
 async def authenticate_user(email: str, password: str):
     # 记录调试信息，记录用户邮箱
@@ -85,14 +155,19 @@ async def authenticate_user(email: str, password: str):
     # 如果用户不存在，则抛出凭证异常
     if not user:
         raise credentials_exception
-    # 如果密码验证失败，则抛出凭证异常
-    if not verify_password(password, user.password):
+    # 如果密码验证失败，则抛出凭证异常（在线程池中执行，不阻塞事件循环）
+    if not await verify_password_async(password, user.password):
         raise credentials_exception
     # 如果用户存在且密码验证成功，则返回用户信息
     return user
 
 # 异步函数，用于获取当前用户
 async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]):
+    # 如果令牌已经验证过且缓存未过期，直接返回缓存的用户
+    user = principal_cache.get(token)
+    if user is not None:
+        return user
+
     # 尝试解码token
     try:
         # 解码JWT令牌
@@ -120,5 +195,7 @@ async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]):
     if user is None: 
         # 抛出凭证异常
         raise credentials_exception   
+    # 缓存已验证的令牌，缓存在令牌过期时一并失效
+    principal_cache.set(token, user, ttl=payload["exp"] - time.time())
     # 返回用户信息
     return user                  
\ No newline at end of file
@@ -17,6 +17,10 @@ os.environ["ENV_STATE"] = "test"
 from database import database, user_table # noqa: E402
 # 从main模块中导入app对象
 from main import app # noqa: E402
+# 从security模块中导入已验证令牌的缓存
+from security import principal_cache # noqa: E402
+# 从routers.post模块中导入帖子列表的响应缓存
+from routers.post import feed_cache # noqa: E402
 
 # 定义一个名为anyio_backend的fixture，作用域为session
 @pytest.fixture(scope="session")
@@ -39,6 +43,9 @@ async def db() -> AsyncGenerator:
     yield
     # 断开数据库连接
     await database.disconnect()
+    # 每个测试结束后数据库会回滚，清空缓存的用户和帖子列表
+    principal_cache.clear()
+    feed_cache.clear()
 
 # 定义一个异步的fixture，用于创建一个异步的客户端
 @pytest.fixture()
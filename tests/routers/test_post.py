@@ -1,5 +1,9 @@
+import logging
 import pytest
 import security
+from config import config
+from database import database
+from logging_conf import RouteSamplingFilter
 from httpx import AsyncClient
 
 # 定义一个异步函数，用于创建帖子
@@ -138,6 +142,41 @@ async def test_like_post(
     assert response.status_code == 201
 
 
+# 定义一个异步的测试函数，用于测试点赞后帖子的点赞数
+@pytest.mark.anyio
+async def test_like_post_updates_like_count(
+    async_client: AsyncClient, created_post: dict, logged_in_token: str
+):
+    # 点赞帖子
+    await like_post(created_post["id"], async_client, logged_in_token)
+
+    # 获取帖子详情
+    response = await async_client.get(f"/post/{created_post['id']}")
+
+    # 断言帖子的点赞数为1
+    assert response.json()["post"]["likes"] == 1
+
+
+# 定义一个异步的测试函数，用于测试重复点赞同一个帖子
+@pytest.mark.anyio
+async def test_like_post_twice(
+    async_client: AsyncClient, created_post: dict, logged_in_token: str
+):
+    # 点赞帖子两次
+    await like_post(created_post["id"], async_client, logged_in_token)
+    response = await async_client.post(
+        "/like",
+        json={"post_id": created_post["id"]},
+        headers={"Authorization": f"Bearer {logged_in_token}"},
+    )
+
+    # 断言第二次点赞返回409
+    assert response.status_code == 409
+    # 断言帖子的点赞数仍然为1
+    response = await async_client.get(f"/post/{created_post['id']}")
+    assert response.json()["post"]["likes"] == 1
+
+
 # 定义一个异步的测试函数，用于测试获取所有帖子
 @pytest.mark.anyio
 async def test_get_all_posts(async_client: AsyncClient, created_post: dict):
@@ -215,6 +254,147 @@ async def test_get_all_posts_sort_likes(
     assert [post["id"] for post in data] == [2, 1]
 
 
+# 定义一个异步的测试函数，用于测试按游标分页获取帖子
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    "sorting, expected_pages",
+    [
+        ("new", [[3, 2], [1]]),
+        ("old", [[1, 2], [3]]),
+    ],
+)
+async def test_get_all_posts_pagination(
+    async_client: AsyncClient,
+    logged_in_token: str,
+    sorting: str,
+    expected_pages: list[list[int]],
+):
+    # 创建三个帖子
+    for i in range(3):
+        await create_post(f"Test Post {i}", async_client, logged_in_token)
+
+    # 获取第一页，每页两条
+    response = await async_client.get("/post", params={"sorting": sorting, "limit": 2})
+    assert response.status_code == 200
+    assert [post["id"] for post in response.json()] == expected_pages[0]
+    # 第一页之后还有数据，响应头中包含下一页的游标
+    cursor = response.headers["X-Next-Cursor"]
+
+    # 使用游标获取第二页
+    response = await async_client.get(
+        "/post", params={"sorting": sorting, "limit": 2, "cursor": cursor}
+    )
+    assert response.status_code == 200
+    assert [post["id"] for post in response.json()] == expected_pages[1]
+    # 最后一页没有下一页的游标
+    assert "X-Next-Cursor" not in response.headers
+
+
+@pytest.mark.anyio
+# 使用anyio库进行异步测试
+async def test_get_all_posts_pagination_sort_likes(
+    async_client: AsyncClient, logged_in_token: str
+):
+    # 创建三个帖子，只对第二个帖子点赞
+    for i in range(3):
+        await create_post(f"Test Post {i}", async_client, logged_in_token)
+    await like_post(2, async_client, logged_in_token)
+
+    # 逐页获取按点赞数排序的帖子，每页一条
+    post_ids = []
+    params = {"sorting": "most_likes", "limit": 1}
+    while True:
+        response = await async_client.get("/post", params=params)
+        assert response.status_code == 200
+        post_ids += [post["id"] for post in response.json()]
+        if "X-Next-Cursor" not in response.headers:
+            break
+        params["cursor"] = response.headers["X-Next-Cursor"]
+
+    # 点赞数相同时按帖子id降序排列
+    assert post_ids == [2, 3, 1]
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("cursor", ["not a cursor", "e30", "eyJpZCI6ICIxIn0"])
+async def test_get_all_posts_invalid_cursor(async_client: AsyncClient, cursor: str):
+    # 使用无效的游标获取帖子
+    response = await async_client.get("/post", params={"cursor": cursor})
+    # 断言返回的状态码为400
+    assert response.status_code == 400
+
+
+@pytest.mark.anyio
+async def test_get_all_posts_cursor_wrong_sorting(
+    async_client: AsyncClient, logged_in_token: str
+):
+    # 创建两个帖子，并获取按新帖子排序的第一页
+    await create_post("Test Post 1", async_client, logged_in_token)
+    await create_post("Test Post 2", async_client, logged_in_token)
+    response = await async_client.get("/post", params={"sorting": "new", "limit": 1})
+    cursor = response.headers["X-Next-Cursor"]
+
+    # 将游标用于另一种排序方式
+    response = await async_client.get(
+        "/post", params={"sorting": "old", "cursor": cursor}
+    )
+    # 断言返回的状态码为400
+    assert response.status_code == 400
+
+
+@pytest.mark.anyio
+# 使用anyio库进行异步测试
+async def test_get_all_posts_not_modified(
+    async_client: AsyncClient, created_post: dict, mocker
+):
+    # 第一次获取所有帖子，响应中包含ETag
+    response = await async_client.get("/post")
+    etag = response.headers["ETag"]
+
+    # 使用If-None-Match再次请求，此时不应该查询数据库
+    spy = mocker.spy(database, "fetch_all")
+    response = await async_client.get("/post", headers={"If-None-Match": etag})
+    # 断言返回304且没有响应体
+    assert response.status_code == 304
+    assert response.content == b""
+    assert spy.call_count == 0
+
+
+@pytest.mark.anyio
+# 使用anyio库进行异步测试
+async def test_get_all_posts_cache_invalidated(
+    async_client: AsyncClient, created_post: dict, logged_in_token: str
+):
+    # 第一次获取所有帖子
+    response = await async_client.get("/post")
+    etag = response.headers["ETag"]
+
+    # 点赞帖子后，帖子列表发生变化
+    await like_post(created_post["id"], async_client, logged_in_token)
+    response = await async_client.get("/post", headers={"If-None-Match": etag})
+
+    # 断言返回新的帖子列表
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.json()[0]["likes"] == 1
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("rate, expected", [(0.0, False), (1.0, True)])
+async def test_get_all_posts_log_sampling(
+    async_client: AsyncClient, caplog, mocker, rate: float, expected: bool
+):
+    # 配置GET /post的日志采样比例
+    mocker.patch.object(config, "LOG_SAMPLE_RATES", {"GET /post": rate})
+    caplog.set_level(logging.INFO)
+    caplog.handler.addFilter(RouteSamplingFilter())
+
+    await async_client.get("/post")
+
+    # 断言日志是否按采样比例保留
+    assert ("Getting all posts" in caplog.messages) is expected
+
+
 @pytest.mark.anyio
 # 使用anyio库进行异步测试
 async def test_get_all_post_wrong_sorting(async_client: AsyncClient):
@@ -299,6 +479,59 @@ async def test_get_post_with_comments(
     }
 
 
+@pytest.mark.anyio
+# 使用anyio库进行异步测试
+async def test_get_comments_on_post_pagination(
+    async_client: AsyncClient, created_post: dict, logged_in_token: str
+):
+    # 创建三条评论
+    comments = [
+        await create_comment(f"Comment {i}", created_post["id"], async_client, logged_in_token)
+        for i in range(3)
+    ]
+
+    # 获取第一页评论，每页两条
+    response = await async_client.get(
+        f"/post/{created_post['id']}/comment", params={"limit": 2}
+    )
+    assert response.status_code == 200
+    assert response.json() == comments[:2]
+
+    # 使用游标获取第二页评论
+    response = await async_client.get(
+        f"/post/{created_post['id']}/comment",
+        params={"limit": 2, "cursor": response.headers["X-Next-Cursor"]},
+    )
+    assert response.status_code == 200
+    assert response.json() == comments[2:]
+    # 最后一页没有下一页的游标
+    assert "X-Next-Cursor" not in response.headers
+
+
+# 使用pytest.mark.anyio装饰器标记此函数为异步函数
+@pytest.mark.anyio
+async def test_get_post_with_comments_first_page(
+    async_client: AsyncClient, created_post: dict, logged_in_token: str
+):
+    # 创建三条评论
+    comments = [
+        await create_comment(f"Comment {i}", created_post["id"], async_client, logged_in_token)
+        for i in range(3)
+    ]
+
+    # 获取帖子及其第一页评论，每页两条
+    response = await async_client.get(f"/post/{created_post['id']}", params={"limit": 2})
+    assert response.status_code == 200
+    assert response.json()["comments"] == comments[:2]
+
+    # 使用响应头中的游标获取剩余的评论
+    response = await async_client.get(
+        f"/post/{created_post['id']}/comment",
+        params={"limit": 2, "cursor": response.headers["X-Next-Cursor"]},
+    )
+    assert response.json() == comments[2:]
+
+
 # 使用pytest.mark.anyio装饰器标记此函数为异步函数
 @pytest.mark.anyio
 async def test_get_missing_post_with_comments(
@@ -308,3 +541,94 @@ async def test_get_missing_post_with_comments(
     response = await async_client.get("/post/2")
     # 断言响应状态码为404
     assert response.status_code == 404
+
+
+# 使用pytest.mark.anyio装饰器标记此函数为异步函数
+@pytest.mark.anyio
+async def test_create_posts_bulk(
+    async_client: AsyncClient, registered_user: dict, logged_in_token: str
+):
+    # 批量创建三个帖子
+    response = await async_client.post(
+        "/post/bulk",
+        json=[{"body": f"Test Post {i}"} for i in range(3)],
+        headers={"Authorization": f"Bearer {logged_in_token}"},
+    )
+    assert response.status_code == 200
+    # 断言每个帖子都创建成功，并按请求顺序返回id
+    assert response.json() == [
+        {"index": i, "status": 201, "id": i + 1, "detail": None} for i in range(3)
+    ]
+
+    # 断言帖子的内容与请求顺序一致
+    response = await async_client.get("/post", params={"sorting": "old"})
+    assert [(post["id"], post["body"]) for post in response.json()] == [
+        (i + 1, f"Test Post {i}") for i in range(3)
+    ]
+
+
+# 使用pytest.mark.anyio装饰器标记此函数为异步函数
+@pytest.mark.anyio
+async def test_create_posts_bulk_missing_data(
+    async_client: AsyncClient, logged_in_token: str
+):
+    # 批量创建帖子，其中一个缺少数据
+    response = await async_client.post(
+        "/post/bulk",
+        json=[{"body": "Test Post"}, {}],
+        headers={"Authorization": f"Bearer {logged_in_token}"},
+    )
+    # 断言整个请求校验失败
+    assert response.status_code == 422
+
+
+# 使用pytest.mark.anyio装饰器标记此函数为异步函数
+@pytest.mark.anyio
+async def test_create_comments_bulk(
+    async_client: AsyncClient, created_post: dict, logged_in_token: str
+):
+    # 批量创建评论，其中一个评论的帖子不存在
+    response = await async_client.post(
+        "/comment/bulk",
+        json=[
+            {"body": "Comment 1", "post_id": created_post["id"]},
+            {"body": "Comment 2", "post_id": 999},
+            {"body": "Comment 3", "post_id": created_post["id"]},
+        ],
+        headers={"Authorization": f"Bearer {logged_in_token}"},
+    )
+    assert response.status_code == 200
+    # 断言每个评论的结果
+    assert [(item["status"], item["id"]) for item in response.json()] == [
+        (201, 1),
+        (404, None),
+        (201, 2),
+    ]
+
+    # 断言只有帖子存在的评论被插入
+    response = await async_client.get(f"/post/{created_post['id']}/comment")
+    assert [comment["body"] for comment in response.json()] == ["Comment 1", "Comment 3"]
+
+
+# 使用pytest.mark.anyio装饰器标记此函数为异步函数
+@pytest.mark.anyio
+async def test_like_posts_bulk(
+    async_client: AsyncClient, created_post: dict, logged_in_token: str
+):
+    # 批量点赞，包括重复点赞和帖子不存在的点赞
+    response = await async_client.post(
+        "/like/bulk",
+        json=[
+            {"post_id": created_post["id"]},
+            {"post_id": created_post["id"]},
+            {"post_id": 999},
+        ],
+        headers={"Authorization": f"Bearer {logged_in_token}"},
+    )
+    assert response.status_code == 200
+    # 断言每个点赞的结果
+    assert [item["status"] for item in response.json()] == [201, 409, 404]
+
+    # 断言帖子的点赞数为1
+    response = await async_client.get(f"/post/{created_post['id']}")
+    assert response.json()["post"]["likes"] == 1
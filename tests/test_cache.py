@@ -0,0 +1,54 @@
+from cache import TTLCache
+
+# 测试缓存的命中和未命中
+def test_get_and_set():
+    cache = TTLCache(maxsize=2, ttl=60)
+    # 未设置的key返回默认值
+    assert cache.get("a") is None
+    cache.set("a", 1)
+    # 设置后可以获取到值
+    assert cache.get("a") == 1
+    # 断言命中和未命中次数
+    assert cache.stats() == {"size": 1, "hits": 1, "misses": 1, "evictions": 0}
+
+# 测试容量满时淘汰最久未使用的条目
+def test_lru_eviction():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    # 访问a，使b成为最久未使用的条目
+    cache.get("a")
+    cache.set("c", 3)
+    # 断言b被淘汰
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.evictions == 1
+
+# 测试条目过期
+def test_expiry(mocker):
+    cache = TTLCache(maxsize=2, ttl=60)
+    # 条目的存活时间不超过缓存的默认存活时间
+    cache.set("a", 1, ttl=120)
+    mocker.patch("cache.time.monotonic", return_value=10**9)
+    # 断言过期后获取不到值
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+# 测试存活时间不大于0时不缓存
+def test_set_non_positive_ttl():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1, ttl=0)
+    # 断言没有缓存
+    assert len(cache) == 0
+
+# 测试按条件删除条目
+def test_remove_where():
+    cache = TTLCache(maxsize=3, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.set("c", 3)
+    # 删除所有值为奇数的条目
+    assert cache.remove_where(lambda value: value % 2 == 1) == 2
+    assert cache.get("b") == 2
+    assert len(cache) == 1
@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+import sqlalchemy
+from config import config
+from database import Database, PoolTimeoutError, database_options, metadata, user_table
+from httpx import AsyncClient
+
+# 定义一个不使用force_rollback的数据库，以便经过带超时和统计的连接
+@pytest.fixture()
+async def pooled_database():
+    pooled = Database(config.DATABASE_URL)
+    await pooled.connect()
+    yield pooled
+    await pooled.disconnect()
+
+# 测试连接池的使用情况
+@pytest.mark.anyio
+async def test_pool_stats(pooled_database: Database):
+    assert pooled_database.pool_stats()["in_use"] == 0
+    # 获取连接期间，连接计入in_use
+    async with pooled_database.connection():
+        assert pooled_database.pool_stats()["in_use"] == 1
+        # 同一个任务重入时不重复计数
+        assert await pooled_database.fetch_val("SELECT 1") == 1
+        assert pooled_database.pool_stats()["in_use"] == 1
+    # 连接归还后in_use恢复为0
+    assert pooled_database.pool_stats() == {"backend": "sqlite", "waiting": 0, "in_use": 0}
+
+# 测试获取连接超时
+@pytest.mark.anyio
+async def test_connection_acquire_timeout(pooled_database: Database, mocker):
+    # 模拟获取连接一直等待
+    async def slow_acquire(self):
+        await asyncio.sleep(1)
+
+    mocker.patch.object(config, "DB_POOL_ACQUIRE_TIMEOUT", 0.01)
+    mocker.patch("databases.backends.sqlite.SQLiteConnection.acquire", slow_acquire)
+
+    # 断言抛出PoolTimeoutError，且不再计入等待中的任务
+    with pytest.raises(PoolTimeoutError):
+        await pooled_database.fetch_val("SELECT 1")
+    assert pooled_database.pool_stats()["waiting"] == 0
+
+# 测试获取连接超时时返回503
+@pytest.mark.anyio
+async def test_pool_timeout_response(async_client: AsyncClient, mocker):
+    mocker.patch("database.database.fetch_all", side_effect=PoolTimeoutError())
+    response = await async_client.get("/post/1/comment")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+# 测试连接池使用情况接口
+@pytest.mark.anyio
+async def test_database_health(async_client: AsyncClient):
+    response = await async_client.get("/health/database")
+    assert response.status_code == 200
+    assert response.json()["backend"] == "sqlite"
+
+# 定义一个启用SQLite高吞吐模式（读写分离）的数据库
+@pytest.fixture()
+async def tuned_database(tmp_path, mocker):
+    mocker.patch.object(config, "SQLITE_TUNED", True)
+    url = f"sqlite:///{tmp_path / 'tuned.db'}"
+    # 创建所有表
+    engine = sqlalchemy.create_engine(url)
+    metadata.create_all(engine)
+    engine.dispose()
+
+    tuned = Database(url, read_write_split=True, **database_options())
+    await tuned.connect()
+    yield tuned
+    await tuned.disconnect()
+
+# 测试高吞吐模式的PRAGMA
+@pytest.mark.anyio
+async def test_sqlite_tuned_pragmas(tuned_database: Database):
+    assert await tuned_database.fetch_val("PRAGMA journal_mode") == "wal"
+    assert await tuned_database.fetch_val("PRAGMA busy_timeout") == config.SQLITE_BUSY_TIMEOUT_MS
+    # synchronous = NORMAL
+    assert await tuned_database.fetch_val("PRAGMA synchronous") == 1
+
+# 测试读写分离：写事务进行中时，其他任务的读操作不需要等待
+@pytest.mark.anyio
+async def test_sqlite_read_write_split(tuned_database: Database):
+    count_users = sqlalchemy.select(sqlalchemy.func.count()).select_from(user_table)
+    await tuned_database.execute(user_table.insert().values(email="a@example.net"))
+
+    async with tuned_database.transaction():
+        await tuned_database.execute(user_table.insert().values(email="b@example.net"))
+        # 事务中的读操作使用写连接，可以看到未提交的数据
+        assert await tuned_database.fetch_val(count_users) == 2
+        # 其他任务的读操作使用只读连接，不等待写事务，只能看到已提交的数据
+        reader_task = asyncio.create_task(tuned_database.fetch_val(count_users))
+        assert await asyncio.wait_for(reader_task, timeout=1) == 1
+
+    # 事务提交后只读连接可以看到新数据
+    assert await tuned_database.fetch_val(count_users) == 2
+    stats = tuned_database.pool_stats()
+    assert stats["max_size"] == 1
+    assert stats["reader"]["max_size"] == config.SQLITE_READ_POOL_SIZE
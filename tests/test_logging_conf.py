@@ -0,0 +1,66 @@
+import logging
+import threading
+
+import logging_conf
+
+
+# 定义一个收集日志记录的处理器，并记录处理日志的线程
+class ListHandler(logging.Handler):
+    def __init__(self) -> None:
+        super().__init__()
+        self.records: list[logging.LogRecord] = []
+        self.threads: set[str] = set()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.records.append(record)
+        self.threads.add(threading.current_thread().name)
+
+
+# 测试邮箱混淆
+def test_obfuscated():
+    assert logging_conf.obfuscated("test@example.net", 2) == "te**@example.net"
+
+
+# 测试日志处理器被移到后台线程中执行，过滤器只在入队前执行一次
+def test_install_queue_handlers():
+    handler = ListHandler()
+    logger = logging.getLogger("test_logging_conf.queue")
+    logger.addHandler(handler)
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+
+    # 安装队列处理器，记录器只保留一个QueueHandler
+    logging_conf.install_queue_handlers(
+        ["test_logging_conf.queue"], [logging_conf.EmailObfuscationFilter(obfuscated_length=2)]
+    )
+    assert len(logger.handlers) == 1
+    assert isinstance(logger.handlers[0], logging.handlers.QueueHandler)
+
+    # 记录一条包含邮箱的日志，并停止监听线程以处理完队列
+    logger.info("Creating user", extra={"email": "test@example.net"})
+    logging_conf.stop_logging()
+
+    # 断言日志在后台线程中处理，且邮箱已被混淆
+    assert [record.getMessage() for record in handler.records] == ["Creating user"]
+    assert handler.records[0].email == "te**@example.net"
+    assert threading.current_thread().name not in handler.threads
+
+
+# 测试延迟格式化：入队时不格式化消息，由后台线程输出时再格式化
+def test_deferred_queue_handler():
+    # 定义一个记录被格式化次数的消息对象
+    class Message:
+        calls = 0
+
+        def __str__(self) -> str:
+            Message.calls += 1
+            return "SELECT 1"
+
+    record = logging.LogRecord("test", logging.DEBUG, __file__, 1, Message(), None, None)
+    prepared = logging_conf.DeferredQueueHandler(None).prepare(record)
+
+    # 断言入队时没有格式化消息
+    assert Message.calls == 0
+    # 断言输出时才格式化消息
+    assert prepared.getMessage() == "SELECT 1"
+    assert Message.calls == 1
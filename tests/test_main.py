@@ -0,0 +1,9 @@
+import pytest
+from httpx import AsyncClient
+
+# 测试健康检查接口
+@pytest.mark.anyio
+async def test_health(async_client: AsyncClient):
+    response = await async_client.get("/health")
+    assert response.status_code == 200
+    assert response.json() == {"status": "ok"}
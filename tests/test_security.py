@@ -23,6 +23,30 @@ def test_password_hashes():
     # 断言密码和密码哈希是否匹配
     assert security.verify_password(password, security.get_password_hash(password))
 
+# 使用pytest.mark.anyio装饰器标记异步测试函数
+@pytest.mark.anyio 
+async def test_password_hashes_async():
+    # 定义一个密码
+    password = "password"
+    # 在线程池中计算密码哈希
+    hashed_password = await security.get_password_hash_async(password)
+    # 断言密码和密码哈希是否匹配
+    assert await security.verify_password_async(password, hashed_password)
+    # 断言错误的密码不匹配
+    assert not await security.verify_password_async("wrong password", hashed_password)
+
+# 使用pytest.mark.anyio装饰器标记异步测试函数
+@pytest.mark.anyio 
+async def test_password_hash_queue_full(mocker):
+    # 模拟线程池和队列已满
+    mocker.patch.object(security, "password_tasks_pending", 2)
+    mocker.patch.object(security.config, "PASSWORD_HASH_WORKERS", 1)
+    mocker.patch.object(security.config, "PASSWORD_HASH_QUEUE_LIMIT", 1)
+    # 断言直接抛出503异常，而不是排队等待
+    with pytest.raises(security.HTTPException) as exc_info:
+        await security.get_password_hash_async("password")
+    assert exc_info.value.status_code == 503
+
 # 使用pytest.mark.anyio装饰器标记异步测试函数
 @pytest.mark.anyio 
 async def test_get_user(registered_user: dict):
@@ -85,4 +109,32 @@ async def test_get_current_user_invalid_token():
    # 使用pytest.raises装饰器，捕获security.HTTPException异常
    with pytest.raises(security.HTTPException):
        # 调用security模块的get_current_user函数，传入无效的token
-       await security.get_current_user("invalid token")
\ No newline at end of file
+       await security.get_current_user("invalid token")
+# 使用pytest.mark.anyio标记异步测试函数
+@pytest.mark.anyio 
+# 定义一个异步函数，用于测试已验证的令牌会被缓存
+async def test_get_current_user_cached(registered_user: dict, mocker):
+    # 生成token，并监视get_user函数的调用
+    token = security.create_access_token(registered_user["email"])
+    spy = mocker.spy(security, "get_user")
+    # 连续两次获取当前用户
+    first = await security.get_current_user(token)
+    second = await security.get_current_user(token)
+    # 断言两次返回同一个用户，且只查询了一次数据库
+    assert first.email == second.email == registered_user["email"]
+    assert spy.call_count == 1
+    assert security.principal_cache.stats()["hits"] >= 1
+
+# 使用pytest.mark.anyio标记异步测试函数
+@pytest.mark.anyio 
+# 定义一个异步函数，用于测试用户记录变化后缓存失效
+async def test_get_current_user_cache_invalidated(registered_user: dict, mocker):
+    # 生成token，并获取当前用户使其被缓存
+    token = security.create_access_token(registered_user["email"])
+    await security.get_current_user(token)
+    # 删除该用户缓存的令牌
+    security.invalidate_user_principals(registered_user["email"])
+    # 断言再次获取当前用户时重新查询了数据库
+    spy = mocker.spy(security, "get_user")
+    await security.get_current_user(token)
+    assert spy.call_count == 1
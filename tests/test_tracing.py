@@ -0,0 +1,34 @@
+import pytest
+import tracing
+
+# 测试采样比例的匹配规则
+@pytest.mark.parametrize(
+    "method, path, expected",
+    [
+        ("POST", "/token", 1.0),
+        ("GET", "/post", 0.01),
+        ("GET", "/post/1", 0.5),
+        ("GET", "/health/database", 0.0),
+        ("POST", "/post", 0.2),
+    ],
+)
+def test_route_sample_rate(method: str, path: str, expected: float):
+    rates = {"POST /token": 1.0, "GET /post": 0.01, "GET /post/*": 0.5, "GET /health*": 0.0}
+    assert tracing.route_sample_rate(method, path, rates, 0.2) == expected
+
+# 测试按路由决定事务的采样比例
+def test_traces_sampler(mocker):
+    mocker.patch.object(tracing.config, "SENTRY_TRACES_SAMPLE_RATES", {"GET /health": 0.0})
+    mocker.patch.object(tracing.config, "SENTRY_TRACES_SAMPLE_RATE", 0.3)
+    scope = {"type": "http", "method": "GET", "path": "/health"}
+    # 断言健康检查不追踪
+    assert tracing.traces_sampler({"asgi_scope": scope}) == 0.0
+    # 断言其他请求使用默认的采样比例
+    assert tracing.traces_sampler({"asgi_scope": {**scope, "path": "/post"}}) == 0.3
+    # 断言沿用上游服务的采样决定
+    assert tracing.traces_sampler({"asgi_scope": scope, "parent_sampled": True}) == 1.0
+
+# 测试没有配置SENTRY_DSN时跳过初始化
+def test_init_sentry_without_dsn(mocker):
+    mocker.patch.object(tracing.config, "SENTRY_DSN", None)
+    assert tracing.init_sentry() is False
@@ -0,0 +1,60 @@
+# 导入 logging模块
+import logging
+
+# 从config模块中导入config变量
+from config import config
+
+# 获取当前模块的日志记录器
+logger = logging.getLogger(__name__)
+
+
+# 查找请求对应的采样比例，key 为 "方法 路径"，以 * 结尾的 key 按前缀匹配
+def route_sample_rate(method: str, path: str, rates: dict[str, float], default: float) -> float:
+    key = f"{method} {path}"
+    # 优先使用完全匹配的采样比例
+    if key in rates:
+        return rates[key]
+    # 其次使用最长的前缀匹配
+    prefixes = [k for k in rates if k.endswith("*") and key.startswith(k[:-1])]
+    if prefixes:
+        return rates[max(prefixes, key=len)]
+    # 没有匹配时使用默认的采样比例
+    return default
+
+
+# Sentry 的 traces_sampler：决定每个事务（请求）是否被追踪
+def traces_sampler(sampling_context: dict) -> float:
+    # 如果上游服务已经做出了采样决定，则沿用该决定，保证分布式追踪完整
+    parent_sampled = sampling_context.get("parent_sampled")
+    if parent_sampled is not None:
+        return float(parent_sampled)
+
+    # 非 HTTP 请求的事务使用默认的采样比例
+    scope = sampling_context.get("asgi_scope") or {}
+    if scope.get("type") != "http":
+        return config.SENTRY_TRACES_SAMPLE_RATE
+
+    # 按路由查找采样比例
+    return route_sample_rate(
+        scope.get("method", ""),
+        scope.get("path", ""),
+        config.SENTRY_TRACES_SAMPLE_RATES,
+        config.SENTRY_TRACES_SAMPLE_RATE,
+    )
+
+
+# 初始化 Sentry，没有配置 SENTRY_DSN 时完全跳过（也不会导入 sentry_sdk）
+def init_sentry() -> bool:
+    if not config.SENTRY_DSN:
+        return False
+
+    import sentry_sdk
+
+    sentry_sdk.init(
+        dsn=config.SENTRY_DSN,
+        # 按路由决定事务的采样比例
+        traces_sampler=traces_sampler,
+        # 被采样的事务中进行性能分析的比例
+        profiles_sample_rate=config.SENTRY_PROFILES_SAMPLE_RATE,
+    )
+    return True